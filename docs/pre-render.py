@@ -1,12 +1,24 @@
 import os, os.path, shutil
 
+def _mtime(path):
+    # only the modification time matters for the freshness check
+    return os.stat(path).st_mtime
+
 def copy_changelog():
     here = os.path.dirname(os.path.realpath(__file__))
     there = os.path.join(here, "..", "CHANGELOG.md")
     target = os.path.join(here, "CHANGELOG.md")
 
+    # stat the target directly rather than probing for existence first; a
+    # missing target just means the copy is stale.
+    src_mtime = _mtime(there)
+    try:
+        stale = src_mtime - _mtime(target) > 1
+    except FileNotFoundError:
+        stale = True
+
     # using copy2 here has very odd effects on quarto?
-    if not os.path.exists(target) or os.stat(there).st_mtime - os.stat(target).st_mtime > 1:
+    if stale:
         shutil.copy(there, here)
 
 # the changelog is best kept in the main repo directory, but it is helpful to
@@ -2,13 +2,32 @@ __all__ = ['core', 'figure', 'semantics', 'html', 'utils', '__main__']
 
 __version_info__ = (0, 5, 1)
 __release__ = False
-__version__ = ".".join(str(i) for i in __version_info__)
-if not __release__:
-    __version__ = __version__ + "-a1"
+# keep in sync with `__version_info__` / `__release__` when bumping versions;
+# set SVGLING_CHECK_VERSION in the environment to verify this on import.
+__version__ = "0.5.1-a1"
 
-import svgling.core
+if __debug__:
+    import os as _os
+    if _os.environ.get("SVGLING_CHECK_VERSION"):
+        _expected = ".".join(str(i) for i in __version_info__)
+        if not __release__:
+            _expected += "-a1"
+        assert __version__ == _expected, (
+            f"__version__ {__version__!r} does not match {_expected!r}")
+        del _expected
+    del _os
 
-draw_tree = svgling.core.draw_tree
-tree2svg = svgling.core.tree2svg
+# `svgling.core` (and therefore svgwrite) is only imported on first access to
+# one of these names, so that e.g. checking `svgling.__version__` stays cheap.
+_lazy_core = ('core', 'draw_tree', 'tree2svg', 'disable_nltk_png')
 
-disable_nltk_png = svgling.core.disable_nltk_png
+def __getattr__(name):
+    if name in _lazy_core:
+        import svgling.core
+        v = svgling.core if name == 'core' else getattr(svgling.core, name)
+        globals()[name] = v
+        return v
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_lazy_core))
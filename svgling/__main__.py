@@ -1,12 +1,21 @@
-import svgling.core
 import sys
 
 def main(*argv):
     if len(argv) != 2:
         print("Please supply a python expression describing a tree.", file=sys.stderr)
         return
-    t = eval(argv[1])
-    layout = svgling.core.TreeLayout(t, options=svgling.core.TreeOptions())
+    import ast
+    try:
+        # the common case is a plain tuple/list literal, which doesn't need
+        # the full compiler
+        t = ast.literal_eval(argv[1])
+    except (ValueError, SyntaxError):
+        # expressions may refer to `svgling` (and `sys`), as they could when
+        # this module imported svgling at the top level
+        import svgling.core
+        t = eval(argv[1], {"svgling": svgling, "sys": sys})
+    import svgling.core
+    layout = svgling.core.TreeLayout(t, options=svgling.core.default_options)
     print(layout._repr_svg_())
 
-main(*sys.argv)
\ No newline at end of file
+main(*sys.argv)
@@ -28,8 +28,13 @@ def treelet_split_nltk(t):
     Returns a tuple consisting of a `str` node label, and a (possibly empty)
     list of children; or `None` if `t` does not implement the ``nltk.Tree`` api.
     """
+    # check for the method up front, rather than raising and catching an
+    # exception for every object that isn't an nltk tree
+    label = getattr(t, 'label', None)
+    if not callable(label):
+        return None
     try:
-        return (t.label(), list(t))
+        return (label(), list(t))
     except (AttributeError, TypeError):
         return None
 
@@ -60,12 +65,18 @@ def probtree_split(t):
     show the probability value.
     """
 
+    label = getattr(t, 'label', None)
+    prob = getattr(t, 'prob', None)
+    if not callable(label) or not callable(prob):
+        return None
     try:
-        return (f"{t.label()} [p={t.prob()}]", list(t))
+        return (f"{label()} [p={prob()}]", list(t))
     except (AttributeError, TypeError):
         return None
 
 
+_fast_seq_types = (tuple, list)
+
 def treelet_split_list(t):
     """Given some tree representation `t`, attempt to split `t` by treating
     it as a lisp-style sequence of a node followed by 0 or more child
@@ -85,7 +96,12 @@ def treelet_split_list(t):
     sequence of children, or `None` if t is either a `str` or a non-sequence.
     """
 
-    if not isinstance(t, collections.abc.Sequence) or isinstance(t, str):
+    tp = type(t)
+    if tp is str:
+        return None
+    # the ABC check is comparatively slow; skip it for the common cases.
+    if tp not in _fast_seq_types and (
+            not isinstance(t, collections.abc.Sequence) or isinstance(t, str)):
         return None
 
     if (len(t) == 0):
@@ -95,6 +111,23 @@ def treelet_split_list(t):
         return (t[0], t[1:])
 
 
+def _treelet_split_leaf(t):
+    return (t, ())
+
+
+# order nltk before general sequence handling: nltk.Tree subclasses `list`
+_split_order = (treelet_split_nltk, treelet_split_list)
+
+# cache of type => splitter function that last succeeded on an object of that
+# type. Only successful splits are recorded, so a type is never permanently
+# treated as a leaf unless it is seeded here.
+_split_dispatch = {
+    str: _treelet_split_leaf,
+    tuple: treelet_split_list,
+    list: treelet_split_list,
+}
+
+
 def tree_split(t, node_fun=lambda x: x):
     """Given some tree representation `t`, attempt to split `t` into a
     a pair consisting of a node and a sequence of child subtrees. A leaf node
@@ -121,13 +154,18 @@ def tree_split(t, node_fun=lambda x: x):
         child subtrees.
     """
 
-    # order nltk before general sequence handling: nltk.Tree subclasses `list`
-    split = treelet_split_nltk(t)
-    if split is not None:
-        return (node_fun(split[0]), split[1])
-    split = treelet_split_list(t)
-    if split is not None:
-        return (node_fun(split[0]), split[1])
+    # try the splitter that last worked for this type first; the whole tree
+    # is typically made of one or two types (e.g. `nltk.Tree` and `str`).
+    split_fun = _split_dispatch.get(type(t))
+    if split_fun is not None:
+        split = split_fun(t)
+        if split is not None:
+            return (node_fun(split[0]), split[1])
+    for split_fun in _split_order:
+        split = split_fun(t)
+        if split is not None:
+            _split_dispatch[type(t)] = split_fun
+            return (node_fun(split[0]), split[1])
     # treat `t` as a leaf node:
     return (node_fun(t), ())
 
@@ -154,8 +192,24 @@ def tree_parse(t, node_fun=lambda x: x):
         a lisp-style tree structure with a node in position 1, followed by
         0 or more subtrees.
     """
+    # iterative depth-first build. Each stack entry is a partial result list
+    # for a subtree, plus an iterator over the children still to parse;
+    # finished subtrees are converted to tuples in their parent's list.
     n, children = tree_split(t, node_fun=node_fun)
-    return (n,) + tuple(tree_parse(c, node_fun=node_fun) for c in children)
+    stack = [([n], iter(children))]
+    while True:
+        result, children = stack[-1]
+        for c in children:
+            n, sub = tree_split(c, node_fun=node_fun)
+            sub_result = [n]
+            result.append(sub_result)
+            stack.append((sub_result, iter(sub)))
+            break
+        else:
+            stack.pop()
+            if not stack:
+                return tuple(result)
+            stack[-1][0][-1] = tuple(result)
 
 
 def _tree_cxr(t, i, split=tree_split):
@@ -228,6 +282,12 @@ def is_leaf(t, split=tree_split):
     bool
         True iff `t` has 0 daughter nodes
     """
+    if split is tree_split:
+        # answer for the plain python cases without splitting `t`
+        if type(t) is str:
+            return True
+        elif type(t) is tuple or type(t) is list:
+            return len(t) <= 1
     return len(tree_cdr(t, split=split)) == 0
 
 
@@ -251,15 +311,20 @@ def tree_depth(t, split=tree_split):
     int
         a non-negative depth value
     """
-    subdepth = 0
-    for subtree in tree_cdr(t, split=split):
-        subdepth = max(subdepth, tree_depth(subtree, split=split))
-    return subdepth + 1
+    # iterative, so that very deep trees don't run into the recursion limit
+    depth = 0
+    stack = [(t, 1)]
+    while stack:
+        t, d = stack.pop()
+        if d > depth:
+            depth = d
+        stack.extend((subtree, d + 1) for subtree in tree_cdr(t, split=split))
+    return depth
 
 
 def leaf_iter(t, split=tree_split):
     """
-    What is the maximum (deepest) depth of tree-like object `t`?
+    Iterate over the leaf nodes of tree-like object `t`, left to right.
 
     Parameters
     ----------
@@ -278,11 +343,14 @@ def leaf_iter(t, split=tree_split):
         Leaf nodes in `t`
     """
 
-    parent, children = split(t)
-    if len(children) == 0:
-        yield parent
-    for c in children:
-        yield from leaf_iter(c, split=split)
+    stack = [t]
+    while stack:
+        parent, children = split(stack.pop())
+        if len(children) == 0:
+            yield parent
+        else:
+            # push in reverse so that the leftmost child is visited first
+            stack.extend(reversed(children))
 
 
 def common_parent(path1, path2):
@@ -304,8 +372,8 @@ def common_parent(path1, path2):
         The longest common shared path for `path1` and `path2`
     """
 
-    for i in range(min(len(path1), len(path2))):
-        if path1[i] != path2[i]:
+    for i, (a, b) in enumerate(zip(path1, path2)):
+        if a != b:
             return tuple(path1[0:i])
     if len(path1) < len(path2):
         return path1
@@ -377,9 +445,20 @@ class VertAlign(enum.Enum):
     def __repr__(self):
         return f'{self.__class__.__name__}.{self.name}'
 
+@functools.lru_cache(maxsize=1024)
+def _unit_str(n, unit):
+    # most coordinates in a tree are repeats (0, 50%, whole ems...)
+    return f"{n:g}{unit}"
+
+def _fmt_unit(n, unit):
+    if not n:
+        # 0 and -0.0 are equal as cache keys, but format differently
+        return f"{n:g}{unit}"
+    return _unit_str(n, unit)
+
 def px(n):
     """Given a numeric value, return a string with ``px`` units."""
-    return f"{n:g}px"
+    return _fmt_unit(n, "px")
 
 def em(n, options=None):
     """Given a numeric size in ``em`` units, produce an appropriate css string
@@ -404,15 +483,15 @@ def em(n, options=None):
         A CSS size string in either ``em`` or ``px`` units.
     """
     if options is None or options.relative_units:
-        return f"{n:g}em"
+        return _fmt_unit(n, "em")
     else:
         # convert into px using the font size specified in options. Per the
         # css spec, 1em is Xpx where X is the current font size.
-        return px(options.em_to_px(n))
+        return _fmt_unit(options.em_to_px(n), "px")
 
 def perc(n):
     """Given a number `n`, convert to a css percentage string."""
-    return f"{n:g}%"
+    return _fmt_unit(n, "%")
 
 crisp_perpendiculars = True
 
@@ -435,6 +514,21 @@ _opt_defaults = dict(
     text_stroke = "",
     tree_split = None)
 
+@functools.lru_cache(maxsize=256)
+def _style_str(font_style, font_size, size_only, scale):
+    # implementation for `TreeOptions.style_str`
+    fs = font_size
+    if scale:
+        fs = int(fs * scale)
+    size = f"font-size: {px(fs)}"
+    # empty or None font_style is effectively inherit. This is risky on
+    # global values...
+    if size_only or not font_style:
+        return size
+    # XX: nothing checks syntax here so it's easy for the user to make
+    # mistakes if they don't use the factory functions...
+    return f"{font_style} {size}"
+
 class TreeOptions(collections.abc.MutableMapping):
     """
     An options container class for tree rendering. This class is a flexible
@@ -484,20 +578,23 @@ class TreeOptions(collections.abc.MutableMapping):
                             see the manual for more details. Default: None
         """
 
+    # every option is a fixed attribute, so there's no need for a per-instance
+    # dict. This also turns a typo like `options.font_sise = 20` into an error.
+    __slots__ = tuple(_opt_defaults) + ("explicit",)
+
     def __init__(self, global_font_style=None, **opts):
-        global _opt_defaults
-        mismatch = [k for k in opts if k not in _opt_defaults]
-        if len(mismatch) == 1:
-            raise TypeError(f"Unknown tree option '{mismatch[0]}'")
-        elif len(mismatch):
-            raise TypeError(f"Unknown tree options: {', '.join(mismatch)}")
+        if opts:
+            mismatch = [k for k in opts if k not in _opt_defaults]
+            if len(mismatch) == 1:
+                raise TypeError(f"Unknown tree option '{mismatch[0]}'")
+            elif len(mismatch):
+                raise TypeError(f"Unknown tree options: {', '.join(mismatch)}")
 
         self.explicit = set(opts.keys())
 
-        fullopts = _opt_defaults.copy() # default values
-        fullopts.update(opts) # values from kwargs to constructor
-        for k in fullopts:
-            setattr(self, k, fullopts[k])
+        # values from kwargs to constructor, otherwise default values
+        for k, default in _opt_defaults.items():
+            setattr(self, k, opts[k] if k in opts else default)
 
         # deprecated name, but still allow setting in constructor. See the
         # managed setter below. Simply overrides `font_style`.
@@ -505,13 +602,11 @@ class TreeOptions(collections.abc.MutableMapping):
             self.global_font_style = global_font_style
 
     def __getitem__(self, k):
-        global _opt_defaults
         if k not in _opt_defaults:
             raise KeyError(k)
         return getattr(self, k)
 
     def __setitem__(self, k, val):
-        global _opt_defaults
         if k not in _opt_defaults:
             raise KeyError(k)
         self.explicit.add(k)
@@ -521,17 +616,22 @@ class TreeOptions(collections.abc.MutableMapping):
         """Clear an option setting from this options object. Unlike a standard
         ``dict`` object, this does not remove `k` from keys, but rather resets
         ``self[k]`` to the default value."""
-        global _opt_defaults
         self[k] = _opt_defaults[k]
         if k in self.explicit:
             self.explicit.remove(k)
 
+    # `Mapping` provides these in terms of `__getitem__`, relying on a
+    # KeyError for missing keys; answer directly instead.
+    def __contains__(self, k):
+        return k in _opt_defaults
+
+    def get(self, k, default=None):
+        return getattr(self, k) if k in _opt_defaults else default
+
     def __len__(self):
-        global _opt_defaults
         return len(_opt_defaults)
 
     def __iter__(self):
-        global _opt_defaults
         return iter(_opt_defaults)
 
     def __repr__(self):
@@ -557,8 +657,15 @@ class TreeOptions(collections.abc.MutableMapping):
 
     def copy(self):
         """Return a copy of this TreeOptions object"""
-        new = TreeOptions()
-        new.update_explicit(self)
+        # every node gets a copy of its options, so this skips the checking
+        # and merging done by the constructor. Equivalent to
+        # `TreeOptions().update_explicit(self)`: only explicitly set values
+        # are carried over.
+        new = TreeOptions.__new__(TreeOptions)
+        explicit = self.explicit
+        for k, default in _opt_defaults.items():
+            setattr(new, k, getattr(self, k) if k in explicit else default)
+        new.explicit = set(explicit)
         return new
 
 
@@ -577,22 +684,17 @@ class TreeOptions(collections.abc.MutableMapping):
             produce only integer font sizes.
 
         """
-        fs = self.font_size
-        if scale:
-            fs = int(fs * scale)
-        size = f"font-size: {px(fs)}"
-        # empty or None font_style is effectively inherit. This is risky on
-        # global values...
-        if size_only or not self.font_style:
-            return size
-        # XX: nothing checks syntax here so it's easy for the user to make
-        # mistakes if they don't use the factory functions...
-        return f"{self.font_style} {size}"
+        # every node has its own options copy, but across a tree (and across
+        # trees) there are only a handful of distinct style strings, so they
+        # are shared via a module-level cache.
+        return _style_str(self.font_style, self.font_size, size_only, scale)
 
     def label_width(self, label):
         """Get a label width in ``em``s given leaf padding, and the average
         glyph width heuristic in the current context."""
-        return (len(str(label)) + self.leaf_padding) / self.average_glyph_width
+        if not isinstance(label, str):
+            label = str(label)
+        return (len(label) + self.leaf_padding) / self.average_glyph_width
 
     def _base_tree_split(self, t):
         # use module-level function
@@ -630,19 +732,6 @@ class TreeOptions(collections.abc.MutableMapping):
                 return self._base_tree_split((node,) + tuple(children))
         return self._base_tree_split(t)
 
-    def tree_height(self, t):
-        """Calculate tree height, in ems. Takes into account multi-line leaf
-        nodes."""
-        # TODO: generalize to multi-line nodes of all kinds.
-        # XX or remove -- this code is not currently used
-        parent, children = self.tree_split(t)
-        if len(children) == 0:
-            return len(parent.split("\n"))
-        subheight = 0
-        for subtree in children:
-            subheight = max(subheight, self.tree_height(subtree))
-        return subheight + self.distance_to_daughter + 1
-
     def em_to_px(self, n):
         """Convert an ``em`` value into (absolute) ``px``, given the current
         font size."""
@@ -661,13 +750,27 @@ def leaf_nodecount(t, options=None):
     """How many nodes wide are all the leafs? Will add padding."""
     if options is None:
         options=TreeOptions()
-    parent, children = options.split(t)
-    if len(children) == 0:
-        return 1 + options.leaf_padding
-    subwidth = 0
-    for subtree in children:
-        subwidth += leaf_nodecount(subtree, options)
-    return subwidth
+    # iterative, but with subtree sums accumulated separately and then added
+    # into their parent's sum, exactly as a recursive sum would: with a
+    # non-integer `leaf_padding`, the grouping affects rounding.
+    split = options.split
+    stack = [iter((t,))]
+    sums = [0]
+    while stack:
+        for subtree in stack[-1]:
+            parent, children = split(subtree)
+            if len(children) == 0:
+                sums[-1] += 1 + options.leaf_padding
+            else:
+                stack.append(iter(children))
+                sums.append(0)
+            break
+        else:
+            stack.pop()
+            subwidth = sums.pop()
+            if not sums:
+                return subwidth
+            sums[-1] += subwidth
 
 ################
 # Tree layout and SVG generation
@@ -679,6 +782,9 @@ def leaf_nodecount(t, options=None):
 class DeferredNodePos(object):
     """Wrapper class that will finalize a node builder with an options object
     supplied from a specific tree context."""
+    # one of these is created for every label in a tree
+    __slots__ = ("text", "f", "outer_opts")
+
     def __init__(self, f, text="", options=None):
         self.text = text
         if not callable(f):
@@ -736,19 +842,28 @@ def multiline_node(text, line_margin=0.0, options=None):
     svg_parent = svgwrite.container.SVG(x=0, y=0, width="100%")
 
     height = 0.0
-    if len(text):
+    if "\n" not in text:
+        # the common case: a single line label.
+        if text:
+            height = 1.0 + line_margin
+            _check_label_paint(options.text_color, options.text_stroke)
+            svg_parent.add(_RawText(text, insert=("50%", em(height, options)),
+                                    text_anchor="middle",
+                                    fill=options.text_color,
+                                    stroke=options.text_stroke))
+        # slightly different behavior on a completely empty label: use height
+        # 0, and an empty parent (not a parent with an empty Text).
+        width = options.label_width(text)
+    else:
         lines = text.split("\n")
+        fill = options.text_color
+        stroke = options.text_stroke
+        _check_label_paint(fill, stroke)
         for line in lines:
             height += 1.0 + line_margin # pre-increment to use as a y position
-            svg_parent.add(svgwrite.text.Text(line, insert=("50%", em(height, options)),
-                                                    text_anchor="middle",
-                                                    fill=options.text_color,
-                                                    stroke=options.text_stroke))
-        width = max([options.label_width(line) for line in lines])
-    else:
-        # slightly different behavior on a completely empty label: use height
-        # and width 0, and an empty parent (not a parent with an empty Text).
-        width=options.label_width("")
+            svg_parent.add(_RawText(line, insert=("50%", em(height, options)),
+                                    text_anchor="middle", fill=fill, stroke=stroke))
+        width = max(options.label_width(line) for line in lines)
 
     return NodePos(svg_parent, x=50, y=0, width=width, height=height,
         options=options, text=text)
@@ -808,6 +923,12 @@ class NodePos(object):
     # in ems. (XX not ideal to hardcode)
     descender_margin = 0.25 # Tree-internal margin for descenders
     annotation_margin = 0.25 # margin at the lower edge -- used for tree annotation positioning
+    # `__dict__` is kept so that node builders can still override the margins
+    # above (or add their own attributes) on individual nodes.
+    __slots__ = ("x", "y", "orig_width", "orig_height", "width", "inner_width",
+                 "height", "inner_height", "depth", "svg", "text", "options",
+                 "edge_styles", "__dict__")
+
     def __init__(self, svg, x=0, y=0, width=0, height=0, options=None, depth=0, text=None):
         self.x = x
         self.y = y
@@ -886,9 +1007,9 @@ class NodePos(object):
         height = self.options.em_to_px(self.em_height(margin=True, full=True))
         tree = svgwrite.Drawing(self.text,
             (px(width), px(height)),
-            style=self.options.style_str())
-        tree.viewbox(minx=0, miny=0, width=width, height=height)
-        tree.fit()
+            style=self.options.style_str(),
+            viewBox=f"0,0,{width},{height}",
+            preserveAspectRatio="xMidYMid meet")
         tree.add(self.get_svg())
         return tree.tostring()
 
@@ -957,6 +1078,9 @@ class NodePos(object):
             A container object for a rendered SVG node. This is normally a
             `DeferredNodePos`.
         """
+        if type(label) is str:
+            # by far the most common case; skip the checks below
+            return node(label)
         if isinstance(label, ElementTree.Element):
             # explicit error message in case someone tries to mix svgling.core
             # with svgling.html
@@ -973,7 +1097,130 @@ class NodePos(object):
             return node(str(label))
 
 
+class _RawElement(object):
+    """A lightweight stand-in for a childless `svgwrite` element. It supports
+    just enough of the svgwrite element api to be added to an svgwrite
+    container and serialized identically, and for attributes to be read and
+    changed afterwards (`attribs`, `update`, item access), but skips
+    svgwrite's per-element attribute handling and validation on construction.
+    Used for the many simple shapes (e.g. edge lines) generated while building
+    a tree."""
+    def __init__(self, elementname, **attribs):
+        self.elementname = elementname
+        # same keyword conventions as svgwrite: `stroke_width` => `stroke-width`
+        self.attribs = {k.rstrip('_').replace('_', '-'): v
+                        for k, v in attribs.items()}
+
+    def __getitem__(self, k):
+        return self.attribs[k]
+
+    def __setitem__(self, k, val):
+        _validator.check_svg_attribute_value(self.elementname, k, val)
+        self.attribs[k] = val
+
+    def update(self, attribs):
+        for k, v in attribs.items():
+            self[k.rstrip('_').replace('_', '-')] = v
+
+    def get_xml(self):
+        xml = ElementTree.Element(self.elementname)
+        for attribute, value in sorted(self.attribs.items()):
+            if value is not None:
+                value = str(value)
+                if value:
+                    xml.set(attribute, value)
+        return xml
+
+    def tostring(self):
+        return ElementTree.tostring(self.get_xml(), encoding="unicode")
+
+class _RawSVG(_RawElement):
+    """A `_RawElement` stand-in for `svgwrite.container.SVG`, used for the
+    nested per-subtree containers. Like the svgwrite class, it starts with an
+    empty ``defs`` element, so that the output is identical."""
+    # nothing is ever added to these, so a single instance is shared
+    _empty_defs = _RawElement("defs")
+
+    def __init__(self, **attribs):
+        # only called with plain attribute names, so no keyword conversion
+        self.elementname = "svg"
+        self.attribs = attribs
+        self.elements = [self._empty_defs]
+
+    def add(self, element):
+        self.elements.append(element)
+        return element
+
+    def get_xml(self):
+        xml = super().get_xml()
+        for element in self.elements:
+            xml.append(element.get_xml())
+        return xml
+
+class _RawText(_RawElement):
+    """A `_RawElement` stand-in for a `svgwrite.text.Text` with plain string
+    content, as used for node label lines. Child elements (e.g. a `TSpan`)
+    can still be added afterwards."""
+    elements = () # replaced by a list on the first `add`
+
+    def __init__(self, text, insert, **extra):
+        super().__init__("text", x=insert[0], y=insert[1], **extra)
+        self.text = text
+
+    def add(self, element):
+        if not self.elements:
+            self.elements = []
+        self.elements.append(element)
+        return element
+
+    def get_xml(self):
+        xml = super().get_xml()
+        xml.text = str(self.text)
+        for element in self.elements:
+            xml.append(element.get_xml())
+        return xml
+
+# `_RawElement`s skip svgwrite's attribute validation, which is fine for the
+# coordinates svgling generates itself. Values that come from users (colors,
+# stroke widths, ...) are instead checked when an element is created from
+# them (or set on it later), so that invalid ones still raise a `TypeError` as
+# they would with svgwrite elements.
+_validator = svgwrite.validator2.get_validator("full", debug=True)
+
+def _check_svg_values(elementname, **attribs):
+    for k, v in attribs.items():
+        _validator.check_svg_attribute_value(elementname,
+                                             k.rstrip('_').replace('_', '-'), v)
+
+@functools.lru_cache(maxsize=64)
+def _check_label_paint(fill, stroke):
+    # called for every label, with values that rarely vary within a tree
+    _check_svg_values("text", fill=fill, stroke=stroke)
+
+@functools.lru_cache(maxsize=64)
+def _check_line_items(items):
+    # called for every edge, with values that rarely vary within a tree
+    _check_svg_values("line", **dict(items))
+
+def _line(start, end, **extra):
+    """Equivalent to `svgwrite.shapes.Line(start, end, **extra)`, but
+    producing a `_RawElement`."""
+    if extra:
+        items = tuple(extra.items())
+        try:
+            hash(items)
+        except TypeError:
+            _check_svg_values("line", **extra)
+        else:
+            _check_line_items(items)
+    return _RawElement("line", x1=start[0], y1=start[1], x2=end[0], y2=end[1],
+                       **extra)
+
 class EdgeStyle(object):
+    __slots__ = ("path", "stroke", "stroke_width")
+    # edges that never draw anything can set this to skip `draw` entirely
+    is_empty = False
+
     def __init__(self, path=None, stroke="black", stroke_width=None):
         if path:
             path = tuple(path)
@@ -988,18 +1235,17 @@ class EdgeStyle(object):
             return object.hash(self)
 
     def svg_opts(self):
-        opts = dict({"stroke": self.stroke})
+        opts = {"stroke": self.stroke}
         if self.stroke_width:
             opts["stroke_width"] = self.stroke_width
         return opts
 
     def draw(self, svg_parent, tree_layout, parent, child):
-        line_start = parent.y + parent.em_height(True)
         box_y = tree_layout.y_distance(parent.depth, child.depth)
-        y_target = em(box_y + child.y, tree_layout.options)
+        y_target = tree_layout._em(box_y + child.y)
         x_target = perc(child.x + child.width / 2)
-        svg_parent.add(svgwrite.shapes.Line(
-                            start=("50%", em(line_start, tree_layout.options)),
+        svg_parent.add(_line(
+                            start=("50%", tree_layout._edge_start(parent)),
                             end=(x_target, y_target),
                             **self.svg_opts()))
 
@@ -1007,6 +1253,7 @@ class EmptyEdge(EdgeStyle):
     # set this for blanket changes. `leaf_edges=False` assumes this default
     # is 0.0. Set to `None` for the equiv of auto_distance=True.
     default_distance = 0.0
+    is_empty = True
 
     def __init__(self, distance=None, auto_distance=False):
         if auto_distance:
@@ -1022,49 +1269,57 @@ class EmptyEdge(EdgeStyle):
 
 class IndirectDescent(EdgeStyle):
     def draw(self, svg_parent, tree_layout, parent, child):
-        from svgwrite.shapes import Line
         if child.depth > parent.depth + 1:
-            line_start = parent.y + parent.em_height(True)
             box_y = tree_layout.y_distance(parent.depth, child.depth)
-            y_target = em(box_y + child.y, tree_layout.options)
+            y_target = tree_layout._em(box_y + child.y)
             x_target = perc(child.x + child.width / 2)
             # we are skipping level(s). Find the y position that an empty
             # node on the next level would have.
-            intermediate_y = em(tree_layout.label_y_dodge(level=parent.depth+1,
-                                                          height=0)[0]
-                        + tree_layout.y_distance(parent.depth, parent.depth+1),
-                        tree_layout.options)
+            intermediate_y = tree_layout._em(
+                        tree_layout.label_y_dodge(level=parent.depth+1,
+                                                  height=0)[0]
+                        + tree_layout.y_distance(parent.depth, parent.depth+1))
+            svg_opts = self.svg_opts()
             # TODO: do as Path?
-            svg_parent.add(Line(start=("50%", em(line_start, tree_layout.options)),
-                                end=(x_target, intermediate_y),
-                                **self.svg_opts()))
-            svg_parent.add(Line(start=(x_target, intermediate_y),
-                                end=(x_target, y_target),
-                                **self.svg_opts()))
+            svg_parent.add(_line(start=("50%", tree_layout._edge_start(parent)),
+                                 end=(x_target, intermediate_y),
+                                 **svg_opts))
+            svg_parent.add(_line(start=(x_target, intermediate_y),
+                                 end=(x_target, y_target),
+                                 **svg_opts))
         else:
             EdgeStyle.draw(self, svg_parent, tree_layout, parent, child)
 
 class TriangleEdge(EdgeStyle):
     def draw(self, svg_parent, tree_layout, parent, child):
-        line_start = parent.y + parent.em_height(True)
+        line_start = tree_layout._edge_start(parent)
         box_y = tree_layout.y_distance(parent.depth, child.depth)
-        y_target = em(box_y + child.y, tree_layout.options)
+        y_target = tree_layout._em(box_y + child.y)
 
         # difference from the midpoint. 0.8 is a heuristic to account for leaf
         # padding. Under normal font conditions, doesn't start to look off until
         # ~60 character widths.
         width_dodge = 0.8 * child.inner_width / 2.0
-        x_target_l = perc(child.x + child.width / 2 - width_dodge)
-        x_target_r = perc(child.x + child.width / 2 + width_dodge)
-        svg_parent.add(svgwrite.shapes.Line(start=("50%", em(line_start, tree_layout.options)),
-                                            end=(x_target_l, y_target),
-                                            **self.svg_opts()))
-        svg_parent.add(svgwrite.shapes.Line(start=("50%", em(line_start, tree_layout.options)),
-                                            end=(x_target_r, y_target),
-                                            **self.svg_opts()))
-        svg_parent.add(svgwrite.shapes.Line(start=(x_target_l, y_target),
-                                            end=(x_target_r, y_target),
-                                            **self.svg_opts()))
+        x_center = child.x + child.width / 2
+        x_target_l = perc(x_center - width_dodge)
+        x_target_r = perc(x_center + width_dodge)
+        svg_opts = self.svg_opts()
+        svg_parent.add(_line(start=("50%", line_start),
+                             end=(x_target_l, y_target),
+                             **svg_opts))
+        svg_parent.add(_line(start=("50%", line_start),
+                             end=(x_target_r, y_target),
+                             **svg_opts))
+        svg_parent.add(_line(start=(x_target_l, y_target),
+                             end=(x_target_r, y_target),
+                             **svg_opts))
+
+# node style options that don't require a relayout; see `TreeLayout._restyle`
+_render_only_styles = frozenset(["debug"])
+
+# edges without an explicit style share these; drawing doesn't change them.
+_direct_edge = EdgeStyle()
+_indirect_edge = IndirectDescent()
 
 class TreeLayout(object):
     """Container class for storing a tree layout state."""
@@ -1084,7 +1339,15 @@ class TreeLayout(object):
             self.tree = t.tree
         else:
             self.tree = t
-        self.annotations = list() # list of svgwrite objects
+        self.annotations = list() # svgwrite (or `_RawElement`) objects
+        self._movement_rows = dict() # y => movement arrows at that y
+        self._edge_start_cache = dict() # only populated during svg building
+        self._em_str_sig = None
+        self._em_cache() # initializes `_em_str_cache` and `_em_str_fmt`
+        self._svg_cache = None # see `get_svg`
+        self._svg_annotations = 0 # annotations already in `_svg_cache`
+        self._svg_sig = None # (em height, debug) when `_svg_cache` was built
+        self._svg_str_cache = None # (drawing, annotations, str); see `_repr_svg_`
         self.layout = None
         self._do_layout(self.tree) # initializes self.layout
 
@@ -1107,19 +1370,27 @@ class TreeLayout(object):
         # they would need a complete redo
         self.annotations = []
 
+    def invalidate(self):
+        """Discard the cached result of `get_svg`. Methods on this class that
+        change the layout do this automatically (and new annotations are
+        added to the cached result); call it after changing options, node
+        styles, or existing annotations directly, or to discard changes made
+        to a `Drawing` returned by `get_svg`."""
+        self._svg_cache = None
+        self._svg_str_cache = None
+
     ######## Annotations
 
     def box_constituent(self, path, stroke="none", rounding=8,
                         stroke_width=1, fill="gray", fill_opacity=0.15):
         (x, y, width, height) = self.subtree_bounds(path)
-        rect = svgwrite.shapes.Rect(insert=(perc(x), em(y, self.options)),
-                                    size=(perc(width), em(height, self.options)),
-                                    stroke=stroke,
-                                    fill=fill,
-                                    fill_opacity=fill_opacity,
-                                    rx=rounding,
-                                    ry=rounding,
-                                    stroke_width=stroke_width)
+        style = dict(stroke=stroke, fill=fill, fill_opacity=fill_opacity,
+                     rx=rounding, ry=rounding, stroke_width=stroke_width)
+        _check_svg_values("rect", **style)
+        self._em_cache()
+        rect = _RawElement("rect", x=perc(x), y=self._em(y),
+                           width=perc(width), height=self._em(height),
+                           **style)
         self.annotations.append(rect)
         return self
 
@@ -1131,9 +1402,11 @@ class TreeLayout(object):
         global crisp_perpendiculars
         if crisp_perpendiculars:
             opts["shape_rendering"] = "crispEdges"
-        underline = svgwrite.shapes.Line(
-                            start=(perc(x), em(y + height, self.options)),
-                            end=(perc(x + width), em(y + height, self.options)),
+        self._em_cache()
+        y_line = self._em(y + height)
+        underline = _line(
+                            start=(perc(x), y_line),
+                            end=(perc(x + width), y_line),
                             **opts)
 
         self.extra_y = max(self.extra_y, (y + height) + 0.5 - (self.em_height() - self.extra_y))
@@ -1141,21 +1414,24 @@ class TreeLayout(object):
         return self
 
     def _movement_find_y(self, x1, x2, y):
-        # try to keep movement arrows from obscuring each other; a bit hacky
-        try:
-            self._movement_arrows
-        except:
-            self._movement_arrows = list()
-        for existing_x1, existing_x2, existing_y in self._movement_arrows:
-            if math.isclose(y, existing_y) and (x1 < existing_x2 or x2 > existing_x1):
-                return self._movement_find_y(x1, x2, y + 0.5)
-        self._movement_arrows.append((x1, x2, y))
+        # try to keep movement arrows from obscuring each other; a bit hacky.
+        # Existing arrows are bucketed by (rounded) y, so that only arrows at
+        # the candidate y need to be checked.
+        while True:
+            row = self._movement_rows.setdefault(round(y, 6), list())
+            if not any(math.isclose(y, existing_y)
+                            and (x1 < existing_x2 or x2 > existing_x1)
+                       for existing_x1, existing_x2, existing_y in row):
+                break
+            y += 0.5
+        row.append((x1, x2, y))
         return y
 
     def deepest_intervening_leaf(self, path1, path2):
         """Find the deepest leaf node between nodes characterized by two paths.
         """
-        return max([n.depth for n in self.leaf_span_iter(path1, path2)])
+        left, right = self._leaf_span_between(path1, path2)
+        return max(self._leaf_depths[left:right])
 
     def movement_arrow(self, path1, path2, stroke="black", stroke_width=1):
         width = self.width()
@@ -1208,9 +1484,7 @@ class TreeLayout(object):
     ######## Layout information
 
     def em_height(self):
-        return (sum([self.level_ys[l] for l in range(self.depth + 1)]) +
-                self.level_heights[self.depth] +
-                self.extra_y)
+        return self._em_height_base + self.extra_y
 
     def em_width(self):
         return self.max_width
@@ -1249,7 +1523,8 @@ class TreeLayout(object):
         the containing svg for level_a?"""
         # level_ys is a dict, so can't use slicing
         level_b = min(self.depth, level_b)
-        return sum([self.level_ys[l] for l in range(level_a + 1, level_b + 1)])
+        level_ys = self.level_ys
+        return sum(level_ys[l] for l in range(level_a + 1, level_b + 1))
 
     def layout_iter(self, path):
         """An iterator over every position in a path, where the head is
@@ -1259,16 +1534,20 @@ class TreeLayout(object):
         """
         node = self.layout
         yield node
-        i = 0
-        for c in path:
-            parent, children = node[0], node[1:]
-            try:
-                node = children[c]
-            except IndexError:
-                raise AttributeError(
-                    "Invalid tree path at index %d (daughter %d)" % (i, c))
+        for i, c in enumerate(path):
+            node = self._daughter(node, i, c)
             yield node
-            i += 1
+
+    @staticmethod
+    def _daughter(pos, i, c):
+        # find daughter `c` of layout position `pos` without slicing out the
+        # children. `i` is the index in the path, for error messages.
+        n = len(pos) - 1
+        if not -n <= c < n:
+            raise AttributeError(
+                "Invalid tree path at index %d (daughter %d)" % (i, c))
+        # pos[0] is the node itself; negative indices count from the end
+        return pos[c + 1] if c >= 0 else pos[c]
 
     def node_iter(self, path):
         """An iterator over every node in a path. Will throw AttributeError
@@ -1280,12 +1559,18 @@ class TreeLayout(object):
     def subtree_iter(self, path):
         """Iterate over every layout position starting at the indicated path.
         Goes depth-first, left-right."""
-        root = self.sublayout(path)
-        def df(pos):
-            yield pos
-            for c in pos[1:]:
-                yield from df(c)
-        return df(root)
+        start, end = self._subtree_span(path)
+        return iter(self._positions[start:end])
+
+    def _subtree_span(self, path):
+        # the pre-order index range covered by the subtree at `path`
+        i = self._position_index[id(self.sublayout(path))]
+        return i, self._subtree_end[i]
+
+    def _leaf_span(self, path):
+        # the range of leaf indices covered by the subtree at `path`
+        start, end = self._subtree_span(path)
+        return self._leaves_before[start], self._leaves_before[end]
 
     def leaf_iter(self, t):
         return leaf_iter(t, split=self.options.split)
@@ -1296,46 +1581,63 @@ class TreeLayout(object):
         so therefore will be non-empty (if the tree is non-empty). The paths
         may be in either order, but the iteration will always be left-to-right.
         """
-        branch = common_parent(path1, path2)
+        left, right = self._leaf_span_between(path1, path2)
+        return iter(self._leaves[left:right])
+
+    def _leaf_span_between(self, path1, path2):
         # the complication comes in here because the path bounds might not
         # specify a constituent (in fact they typically won't unless they are
-        # equal).
-        constituent_leaves = list(self.leaf_iter(self.sublayout(branch)))
-        path1_leaves = list(self.leaf_iter(self.sublayout(path1)))
-        path2_leaves = list(self.leaf_iter(self.sublayout(path2)))
-        for i in range(len(constituent_leaves)):
-            if constituent_leaves[i] == path1_leaves[0]:
-                path1_i = i
-            if constituent_leaves[i] == path2_leaves[0]:
-                path2_i = i
+        # equal). Leaves are indexed left to right across the whole tree, so
+        # the span is just a slice between the two paths' leaves.
+        path1_i, path1_end = self._leaf_span(path1)
+        path2_i, path2_end = self._leaf_span(path2)
         if path1_i < path2_i:
-            left = path1_i
-            right = path2_i + len(path2_leaves)
+            return path1_i, path2_end
         else:
-            left = path2_i
-            right = path1_i + len(path1_leaves)
-        return iter(constituent_leaves[left:right])
+            return path2_i, path1_end
 
     def sublayout(self, path):
         """Find the position in the layout given by a tree path, i.e. a sequence
         of daughter indices (indexed from 0). Will throw AttributeError on an
         invalid path."""
-        return list(self.layout_iter(path))[-1]
+        key = tuple(path)
+        r = self._sublayout_cache.get(key)
+        if r is None:
+            r = self._sublayout_cache[key] = self._descend(path)[-1]
+        return r
+
+    def _descend(self, path):
+        # the list of layout positions from the root down to `path`; the
+        # non-generator equivalent of `layout_iter`.
+        pos = self.layout
+        r = [pos]
+        for i, c in enumerate(path):
+            pos = self._daughter(pos, i, c)
+            r.append(pos)
+        return r
 
     def nmost_path(self, path, n):
         """Find the deepest path from starting position `path` that can be
         reached via daughter index n repeatedly."""
+        key = (tuple(path), n)
+        r = self._nmost_path_cache.get(key)
+        if r is None:
+            r = self._nmost_path_cache[key] = self._nmost_path(path, n)
+        # callers get their own (mutable) copy
+        return list(r)
+
+    def _nmost_path(self, path, n):
+        # walk the flat daughter index rather than slicing layout lists
         path = list(path)
-        t = self.sublayout(path)
-        parent, children = t[0], t[1:]
-        i = len(path)
-        while i < self.depth + 1:
-            try:
-                parent, children = children[n][0], children[n][1:]
-                path = path + [n]
-            except IndexError:
-                break
-        return path
+        i = self._position_index[id(self.sublayout(path))]
+        children_idx = self._children_idx
+        while True:
+            children = children_idx[i]
+            # stop at the first node without a daughter `n` (e.g. a leaf)
+            if not -len(children) <= n < len(children):
+                return path
+            i = children[n]
+            path.append(n)
 
     def leftmost_path(self, path=()):
         """Find the deepest path starting position `path` that can be
@@ -1350,10 +1652,17 @@ class TreeLayout(object):
     def node_x_vals(self, path):
         """Find, relative to the outer svg, the x position and width for node
         at position `path`. Both values are in percentages."""
+        key = tuple(path)
+        r = self._xvals_cache.get(key)
+        if r is None:
+            r = self._xvals_cache[key] = self._node_x_vals(path)
+        return r
+
+    def _node_x_vals(self, path):
         left = 0.0
         width = 100.0
-        i = 0
-        for node in self.node_iter(path):
+        for pos in self._descend(path):
+            node = pos[0]
             left += node.x * width / 100.0
             width = width * node.width / 100.0
         return left, width
@@ -1363,8 +1672,16 @@ class TreeLayout(object):
         `path`, in the format of a tuple (x, y, width, height). X values are
         in percentages, and Y values are in ems. The values are relative to the
         outermost svg."""
+        key = tuple(path)
+        r = self._bounds_cache.get(key)
+        if r is None:
+            r = self._bounds_cache[key] = self._subtree_bounds(path)
+        return r
+
+    def _subtree_bounds(self, path):
         parent = self.sublayout(path)
-        deepest = max([l.depth for l in self.leaf_iter(parent)])
+        start, end = self._leaf_span(path)
+        deepest = max(self._leaf_depths[start:end])
         left_path = self.leftmost_path(path)
         right_path = self.rightmost_path(path)
         x = self.node_x_vals(left_path)[0]
@@ -1406,6 +1723,7 @@ class TreeLayout(object):
             raise AttributeError("Invalid daughter index %d" % daughter)
         daughter = daughter % len(children) # handle negative indices
         parent.set_edge_style(daughter, style)
+        self.invalidate()
         return self
 
     def set_subtree_style(self, path, **opts):
@@ -1415,7 +1733,7 @@ class TreeLayout(object):
             raise TypeError(f"Allowed subtree option keys: {', '.join(allowed)}")
         for pos in self.subtree_iter(path):
             pos[0].options.update(**opts)
-        self.relayout()
+        self._restyle(opts)
         return self
 
     def set_leaf_style(self, **opts):
@@ -1423,9 +1741,9 @@ class TreeLayout(object):
         # Maybe: disallow font_size if relative_units = True?
         if any(k not in allowed for k in opts.keys()):
             raise TypeError(f"Allowed subtree option keys: {', '.join(allowed)}")
-        for l in self.leaf_iter(self.layout):
+        for l in self._leaves:
             l.options.update(**opts)
-        self.relayout()
+        self._restyle(opts)
         return self
 
     def set_node_style(self, path, **opts):
@@ -1434,20 +1752,28 @@ class TreeLayout(object):
         if any(k not in allowed for k in opts.keys()):
             raise TypeError(f"Allowed node option keys: {', '.join(allowed)}")
         self.sublayout(path)[0].options.update(**opts)
-        self.relayout()
+        self._restyle(opts)
         return self
 
+    def _restyle(self, opts):
+        # node styles other than `debug` are baked into the node svgs when
+        # they are built, or affect sizing, so need a full relayout. `debug`
+        # is only consulted while building the tree svg.
+        if opts.keys() - _render_only_styles:
+            self.relayout()
+        else:
+            self.invalidate()
+
     def clear_edge_styles(self):
-        for n in self.node_iter():
+        for n in self._nodes:
             n.clear_edge_styles()
+        self.invalidate()
         return self
 
     def _do_layout(self, t):
         self.level_heights = dict()
         self.level_ys = dict({0: 0})
-        self.depth =  tree_depth(t, split=self.options.split) - 1
-        for i in range(self.depth + 1):
-            self.level_heights[i] = 0
+        # sets self.depth and self.level_heights as a side effect
         parsed = self._build_initial_layout(t, self.layout)
         self._calc_level_ys()
         if len(parsed) > 0:
@@ -1457,72 +1783,176 @@ class TreeLayout(object):
         if len(parsed) > 0: # normalize_widths doesn't affect parents
             parsed[0].width = 100.0
             parsed[0].x = 0
-        self._normalize_widths(parsed)
-        self._normalize_y(parsed)
         self.layout = parsed
+        # the flat index only depends on the tree structure, and the
+        # remaining passes use it rather than re-walking the nested layout
+        self._index_layout()
+        self._normalize_widths()
+        self._normalize_y()
+        self._clear_path_caches()
+        self.invalidate()
+
+    def _index_layout(self):
+        # flat, pre-order views of the nested layout: `_positions[i]` is the
+        # layout list for node `_nodes[i]`, with daughter indices,
+        # and `_subtree_end[i]` the index just past the subtree at `i`.
+        positions = list()
+        children_idx = list()
+        stack = [(self.layout, -1)]
+        while stack:
+            pos, parent = stack.pop()
+            i = len(positions)
+            positions.append(pos)
+            children_idx.append(list())
+            if parent >= 0:
+                children_idx[parent].append(i)
+            stack.extend((c, i) for c in reversed(pos[1:]))
+
+        subtree_end = [0] * len(positions)
+        for i in reversed(range(len(positions))):
+            children = children_idx[i]
+            subtree_end[i] = subtree_end[children[-1]] if children else i + 1
+
+        self._positions = positions
+        self._nodes = [pos[0] for pos in positions]
+        self._children_idx = children_idx
+        self._subtree_end = subtree_end
+        self._position_index = {id(pos): i for i, pos in enumerate(positions)}
+
+        # leaves in left-to-right order, and for each pre-order index, how
+        # many leaves precede it
+        self._leaves = list()
+        self._leaves_before = list()
+        for i, children in enumerate(children_idx):
+            self._leaves_before.append(len(self._leaves))
+            if not children:
+                self._leaves.append(self._nodes[i])
+        self._leaves_before.append(len(self._leaves))
+        self._leaf_depths = [l.depth for l in self._leaves]
+
+    def _clear_path_caches(self):
+        # per-path query results; these depend on the finished layout
+        self._sublayout_cache = dict()
+        self._nmost_path_cache = dict()
+        self._xvals_cache = dict()
+        self._bounds_cache = dict()
 
     def _build_initial_layout(self, t, old_layout=None, level=0):
         # initialize raw widths and node heights, both in em at this point.
         # also initialize level_heights for all levels, and depth values for
-        # nodes.
-        parent, children = self.options.split(t)
-        if old_layout:
-            node_options = old_layout[0].options
-            old_child_layout = old_layout[1:]
-        else:
-            node_options = self.options
-            # dummy values
-            old_child_layout = [None] * len(children)
-
-        # if leaf nodes align, all leaf nodes contribute to height for the
-        # deepest level, not their actual depth
-        if len(children) == 0 and self.options.leaf_nodes_align:
-            level = self.depth
-        node = NodePos.in_context(parent, depth=level, options=node_options)
-        # n.b. this doesn't fully make sense if a custom node overrides the
-        # font size...
-        node.height = node.height * node.options.font_size / self.options.font_size
-
-        real_node_height = node.height
-        # real_node_height = real_node_height * node_options.font_size / self.options.font_size
-
-        self.level_heights[level] = max(self.level_heights[level], real_node_height)
-        result_children = [self._build_initial_layout(
-                                    children[i], old_child_layout[i], level+1)
-                            for i in range(len(children))]
-
-        # take into account any font size tweaks on a particular node label
-        node.width = max(
-            node.width * node.options.font_size / self.options.font_size,
-            sum([c[0].width for c in result_children]))
-        return [node] + result_children
+        # nodes, as well as the overall tree depth.
+        #
+        # This is done iteratively: a pre-order pass builds the nodes and the
+        # nested layout lists, and then widths are filled in bottom-up by
+        # walking the pre-order sequence in reverse. Since the tree depth is
+        # only known at the end of the first pass, aligned leaf nodes are
+        # assigned to their level afterwards.
+        layout = list()
+        preorder = list()
+        aligned_leaves = list()
+        self.depth = level
+        stack = [(t, old_layout, level, layout)]
+        while stack:
+            t, old_layout, level, result = stack.pop()
+            parent, children = self.options.split(t)
+            if old_layout:
+                node_options = old_layout[0].options
+                old_child_layout = old_layout[1:]
+            else:
+                node_options = self.options
+                # dummy values
+                old_child_layout = [None] * len(children)
+
+            if level > self.depth:
+                self.depth = level
+            node = NodePos.in_context(parent, depth=level, options=node_options)
+            # n.b. this doesn't fully make sense if a custom node overrides the
+            # font size...
+            node.height = node.height * node.options.font_size / self.options.font_size
+
+            # if leaf nodes align, all leaf nodes contribute to height for the
+            # deepest level, not their actual depth
+            if len(children) == 0 and self.options.leaf_nodes_align:
+                aligned_leaves.append(node)
+            else:
+                self._update_level_height(level, node.height)
+            result.append(node)
+            result_children = [list() for c in children]
+            result.extend(result_children)
+            preorder.append(result)
+            for i in reversed(range(len(children))):
+                stack.append((children[i], old_child_layout[i], level + 1,
+                              result_children[i]))
+
+        for node in aligned_leaves:
+            node.depth = self.depth
+            self._update_level_height(self.depth, node.height)
+        # ensure that every level has a height entry
+        for i in range(self.depth + 1):
+            self.level_heights.setdefault(i, 0)
+
+        font_size = self.options.font_size
+        for result in reversed(preorder):
+            node = result[0]
+            # take into account any font size tweaks on a particular node label
+            node.width = max(node.width * node.options.font_size / font_size,
+                             sum([c[0].width for c in result[1:]]))
+        return layout
+
+    def _update_level_height(self, level, height):
+        self.level_heights[level] = max(self.level_heights.get(level, 0), height)
 
     def _sublayout_width(self, t):
         if t[0].options.horiz_spacing == HorizOptions.TEXT:
             return t[0].width # precalculated
         elif t[0].options.horiz_spacing == HorizOptions.NODES:
+            # `leaf_nodecount(t, t[0].options)` pads every leaf with the
+            # subtree root's `leaf_padding`. If all the leaves already have
+            # that padding, the sum from `_normalize_widths` is the same
+            # value, without re-splitting the subtree for every ancestor.
+            i = self._position_index[id(t)]
+            if self._leaf_paddings[i] == t[0].options.leaf_padding:
+                return self._padded_leaf_widths[i]
             return leaf_nodecount(t, t[0].options)
         else: # EVEN
             return 1
 
-    def _normalize_widths(self, t):
+    def _normalize_widths(self):
         # normalize tree widths to percentages in the appropriate way.
-        parent, children = t[0], t[1:]
-        if len(children) == 0:
-            return
-        # recurse first, so that parent widths are still in ems
-        for c in children:
-            self._normalize_widths(c)
+        # Subtrees must be handled before their parents, so that parent widths
+        # are still in ems: go through the pre-order index in reverse.
+        # Padded leaf widths for NODES spacing are summed in the same pass,
+        # grouped by subtree as `leaf_nodecount` does (this matters for
+        # rounding if `leaf_padding` isn't an integer), along with the
+        # `leaf_padding` shared by all leaves of each subtree (`None` if they
+        # differ).
+        positions = self._positions
+        nodes = self._nodes
+        children_idx = self._children_idx
+        padded = self._padded_leaf_widths = [0] * len(positions)
+        paddings = self._leaf_paddings = [None] * len(positions)
+        for i in reversed(range(len(positions))):
+            children = children_idx[i]
+            if children:
+                padded[i] = sum(padded[c] for c in children)
+                p = paddings[children[0]]
+                if all(paddings[c] == p for c in children):
+                    paddings[i] = p
+                self._normalize_subtree_widths(positions[i])
+            else:
+                p = paddings[i] = nodes[i].options.leaf_padding
+                padded[i] = 1 + p
+        self._padded_leaf_widths = None
+        self._leaf_paddings = None
 
-        widths = list()
-        sub_sum = 0
-        em_sum = 0
+    def _normalize_subtree_widths(self, t):
+        # normalize the widths of the immediate daughters of `t`
+        parent, children = t[0], t[1:]
         # calculate widths according to scheme determined by options. This
         # may or may not be in real units.
-        for c in children:
-            widths.append(self._sublayout_width(c))
-            sub_sum += widths[-1]
-            em_sum += c[0].width
+        widths = [self._sublayout_width(c) for c in children]
+        sub_sum = sum(widths)
+        em_sum = sum([c[0].width for c in children])
 
         # if the parent node is wider than all the children, the parent box is
         # what will determine the overall box size. The limiting case of this
@@ -1531,14 +1961,15 @@ class TreeLayout(object):
             em_sum = parent.inner_width
         # normalize to percentages
         x_pos = 0
-        for i in range(len(widths)):
+        for c, w in zip(children, widths):
             # TODO: inner width is not very accurate for non-TEXT width schemes.
             # Could calculate it relative to the entire canvas? Could I just
             # switch to viewbox-determined units rather than percentages?
-            children[i][0].inner_width = children[i][0].inner_width * 100.0 / em_sum
-            children[i][0].width = widths[i] * 100.0 / sub_sum
-            children[i][0].x = x_pos
-            x_pos += children[i][0].width
+            child = c[0]
+            child.inner_width = child.inner_width * 100.0 / em_sum
+            child.width = w * 100.0 / sub_sum
+            child.x = x_pos
+            x_pos += child.width
 
     def _calc_level_ys(self):
         # Calculate the y position of each row, relative to containing svg
@@ -1546,19 +1977,73 @@ class TreeLayout(object):
         for i in range(1, self.depth + 1):
             self.level_ys[i] = (self.options.distance_to_daughter
                                 + self.level_heights[i - 1])
+        # the tree height without `extra_y`; see `em_height`
+        self._em_height_base = (sum(self.level_ys[l] for l in range(self.depth + 1))
+                                + self.level_heights[self.depth])
 
-    def _normalize_y(self, t):
+    def _normalize_y(self):
         # calculate y distances for each level. This is done on a second pass
         # because it needs level_heights to be initialized.
-        parent, children = t[0], t[1:]
-        if (self.options.vert_align == VertAlign.FULL):
-            parent.height = self.level_heights[parent.depth]
-        parent.y = self.label_y_dodge(node=parent)[0]
-        for c in children:
-            self._normalize_y(c)
+        # this is the top dodge from `label_y_dodge`, inlined, with the
+        # alignment dispatch done once for the whole tree.
+        vert_align = self.options.vert_align
+        level_heights = self.level_heights
+        nodes = self._nodes
+        if vert_align == VertAlign.CENTER:
+            for n in nodes:
+                n.y = (level_heights[n.depth] - n.height) / 2.0
+        elif vert_align == VertAlign.BOTTOM:
+            for n in nodes:
+                n.y = level_heights[n.depth] - n.height
+        elif vert_align == VertAlign.FULL:
+            for n in nodes:
+                n.height = level_heights[n.depth]
+                n.y = 0
+        else:
+            for n in nodes:
+                n.y = 0
 
     ######### SVG building
 
+    def _edge_start(self, parent):
+        """The y position (as a CSS string) where edges to the daughters of
+        `parent` start. This is shared by all daughters, so it is computed
+        once per parent node during an svg build."""
+        k = id(parent)
+        r = self._edge_start_cache.get(k)
+        if r is None:
+            r = self._edge_start_cache[k] = self._em(
+                parent.y + parent.em_height(True))
+        return r
+
+    def _em_cache(self):
+        """Validate the `_em` string cache against the options that `em`
+        depends on, clearing it if they have changed."""
+        relative, font_size = sig = (self.options.relative_units,
+                                     self.options.font_size)
+        if sig != self._em_str_sig:
+            self._em_str_cache = dict()
+            self._em_str_sig = sig
+            # the multiplier and unit that `em` would use for these options
+            if relative:
+                self._em_str_fmt = (1, "em")
+            else:
+                self._em_str_fmt = (font_size, "px")
+        return self._em_str_cache
+
+    def _em(self, n):
+        """Equivalent to `em(n, self.options)`. Rendered y positions fall on a
+        small set of repeated values, so the strings are shared. Only valid
+        if `_em_cache` has been called since the options last changed."""
+        s = self._em_str_cache.get(n)
+        if s is None:
+            factor, unit = self._em_str_fmt
+            s = f"{n * factor:g}{unit}"
+            if n:
+                # 0 and -0.0 are equal as cache keys, but format differently
+                self._em_str_cache[n] = s
+        return s
+
     def _svg_add_subtree(self, svg_parent, t):
         # This uses several tricks to simulate the ways in which relative
         # positioning in raw SVG is hard:
@@ -1570,53 +2055,83 @@ class TreeLayout(object):
         #    to accurately get text sizes ahead of time (without somehow
         #    doing or simulating rendering) when generating SVG. So since `em`s
         #    ought to be relative to text size, only use that.
-        from svgwrite.shapes import Line
-        parent, children = t[0], t[1:]
-        svg_parent.add(parent.get_svg(self.options))
-        i = 0
-        for c in children:
-            if not self.options.leaf_edges and is_leaf(c):
-                edge = EmptyEdge()
-                if edge.distance is not None and c[0].depth - parent.depth > 0:
-                    # multi-level descent; we probably have `leaf_nodes_align`
-                    # set. One option might be to error, but this implements
-                    # a behavior where the leaf row is aligned immediately
-                    # below the prior level.
-                    edge.distance += self.y_distance(parent.depth, c[0].depth - 1)
-            elif parent.has_edge_style(i):
-                edge = parent.get_edge_style(i)
-            elif parent.options.descend_direct:
-                edge = EdgeStyle()
-            else:
-                edge = IndirectDescent()
-
-            if isinstance(edge, EmptyEdge) and edge.distance is not None:
-                # XX near code dup width edge rendering code
-                box_y = edge.distance + parent.y + parent.em_height(margin=False)
-            else:
-                box_y = self.y_distance(parent.depth, c[0].depth)
-
-            child = svgwrite.container.SVG(x=perc(c[0].x),
-                                           y=em(box_y, self.options),
-                                           width=perc(c[0].width))
-            style = c[0].options.style_str()
-            if style != parent.options.style_str():
-                child['style'] = style
-
-            if parent.options.debug or c[0].options.debug:
-                # XX: for very unclear reasons, the lower edge of these rects
-                # are drawn out of frame. 100% in the y dimension must not
-                # mean what I think, but why?
-                child.add(svgwrite.shapes.Rect(insert=("0%","0%"),
-                                               size=("100%", "100%"),
-                                               fill="none", stroke="red"))
-
-            svg_parent.add(child)
-
-            edge.draw(svg_parent, self, parent, c[0])
-
-            self._svg_add_subtree(child, c)
-            i += 1
+        # Rather than walking the nested layout, this does one flat pass over
+        # the pre-order index built by `_index_layout`: a node's parent always
+        # precedes it, so its container already exists when it is visited.
+        # (Each subtree only ever adds to its own container, so visiting order
+        # across containers doesn't affect the output.)
+        options = self.options
+        nodes = self._nodes
+        children_idx = self._children_idx
+        root = self._position_index[id(t)]
+        containers = {root: svg_parent}
+        leaf_edges = options.leaf_edges
+        y_distance = self.y_distance
+        # (parent depth, child depth) => y_distance; these pairs repeat
+        # across siblings and subtrees
+        box_ys = dict()
+        # debug can be set per node, but normally isn't set anywhere; in that
+        # case skip checking it for every daughter.
+        any_debug = any(n.options.debug for n in self._nodes)
+        if any_debug:
+            # the debug outline is identical for every subtree container, so
+            # a single element is shared between them.
+            debug_rect = _RawElement("rect", x="0%", y="0%",
+                                     width="100%", height="100%",
+                                     fill="none", stroke="red")
+        end = self._subtree_end[root]
+        # each node's style is needed both as a parent and as a daughter
+        styles = [n.options.style_str() for n in nodes[root:end]]
+        for p in range(root, end):
+            svg_parent = containers.pop(p)
+            parent = nodes[p]
+            svg_parent.add(parent.get_svg(options))
+            parent_style = styles[p - root]
+            for i, ci in enumerate(children_idx[p]):
+                cpos = nodes[ci]
+                if not leaf_edges and not children_idx[ci]:
+                    edge = EmptyEdge()
+                    if edge.distance is not None and cpos.depth - parent.depth > 0:
+                        # multi-level descent; we probably have `leaf_nodes_align`
+                        # set. One option might be to error, but this implements
+                        # a behavior where the leaf row is aligned immediately
+                        # below the prior level.
+                        edge.distance += y_distance(parent.depth, cpos.depth - 1)
+                else:
+                    edge = parent.get_edge_style(i)
+                    if edge is None:
+                        if parent.options.descend_direct:
+                            edge = _direct_edge
+                        else:
+                            edge = _indirect_edge
+
+                if edge.is_empty and edge.distance is not None:
+                    # XX near code dup width edge rendering code
+                    box_y = edge.distance + parent.y + parent.em_height(margin=False)
+                else:
+                    key = (parent.depth, cpos.depth)
+                    box_y = box_ys.get(key)
+                    if box_y is None:
+                        box_y = box_ys[key] = y_distance(*key)
+
+                child = _RawSVG(x=f"{cpos.x:g}%", y=self._em(box_y),
+                                width=f"{cpos.width:g}%")
+                style = styles[ci - root]
+                if style != parent_style:
+                    child.attribs['style'] = style
+
+                if any_debug and (parent.options.debug or cpos.options.debug):
+                    # XX: for very unclear reasons, the lower edge of these rects
+                    # are drawn out of frame. 100% in the y dimension must not
+                    # mean what I think, but why?
+                    child.add(debug_rect)
+
+                svg_parent.add(child)
+
+                if not edge.is_empty:
+                    edge.draw(svg_parent, self, parent, cpos)
+
+                containers[ci] = child
 
     def svg_build_tree(self, name="tree"):
         """Build an `svgwrite.Drawing` object based on the layout calculated
@@ -1628,47 +2143,85 @@ class TreeLayout(object):
         # code that adjusts the tree spacing dynamically after the initial
         # rendering. Here we try to do as well as possible with pure python =>
         # SVG.
-        width = self.width()
-        height = self.height()
+        em_width = self.em_width()
+        em_height = self.em_height()
+        # same as `self.width()` / `self.height()`
+        width = self.options.em_to_px(em_width)
+        height = self.options.em_to_px(em_height)
 
         if self.layout:
             style = self.layout[0].options.style_str()
         else:
             style = self.options.style_str() # fallback, shouldn't matter much
 
-        tree = svgwrite.Drawing(name, (px(width), px(height)), style=style)
-        tree.viewbox(minx=0, miny=0, width=width, height=height)
-        tree.fit()
+        # equivalent to calling `tree.viewbox(...)` and `tree.fit()`
+        tree = svgwrite.Drawing(name, (px(width), px(height)), style=style,
+                                viewBox=f"0,0,{width},{height}",
+                                preserveAspectRatio="xMidYMid meet")
 
+        self._em_cache()
         if self.options.debug:
             tree.add(tree.rect(insert=(0,0), size=("100%", "100%"),
                 fill="none", stroke="lightgray"))
-            for i in range(1, int(self.em_width())):
-                tree.add(tree.line(start=(em(i, self.options), 0),
-                                   end=(em(i, self.options), "100%"),
+            xs = [self._em(i) for i in range(1, int(em_width))]
+            ys = [self._em(i) for i in range(1, int(em_height))]
+            for x in xs:
+                tree.add(tree.line(start=(x, 0), end=(x, "100%"),
                                    stroke="lightgray"))
-            for i in range(1, int(self.em_height())):
-                tree.add(tree.line(start=(0, em(i, self.options)),
-                                   end=("100%", em(i, self.options)),
+            for y in ys:
+                tree.add(tree.line(start=(0, y), end=("100%", y),
                                    stroke="lightgray"))
 
+        self._edge_start_cache = dict()
         self._svg_add_subtree(tree, self.layout)
+        self._edge_start_cache = dict()
 
-        for a in self.annotations:
-            tree.add(a)
+        # annotations are all shapes created by this class, so svgwrite's
+        # per-element child validation in `add` can be skipped
+        tree.elements.extend(self.annotations)
         return tree
 
     def saveas(self, filename, pretty=False, indent=2):
         return self.get_svg().saveas(filename, pretty=pretty, indent=indent)
 
     def get_svg(self):
-        tree = self.svg_build_tree()
-        for a in self.annotations:
-            tree.add(a)
+        """Get an `svgwrite.Drawing` object for this tree. This object is
+        cached and shared between calls until the layout changes (see
+        `invalidate`), so modifications to it carry over to later calls to
+        `get_svg`, `saveas`, and the rendered output."""
+        tree = self._cached_svg()
+        # the caller may modify the drawing, so don't trust a serialization
+        # made before this point
+        self._svg_str_cache = None
+        return tree
+
+    def _cached_svg(self):
+        tree = self._svg_cache
+        n = len(self.annotations)
+        # new annotations can extend the canvas (via `extra_y`), which changes
+        # the size of the drawing and the debug grid; rebuild in that case.
+        # Debug output is always rebuilt, and so is a drawing built with it.
+        sig = (self.em_height(), self.options.debug)
+        if (tree is None or n < self._svg_annotations or self.options.debug
+                or sig != self._svg_sig):
+            tree = self._svg_cache = self.svg_build_tree()
+            self._svg_sig = sig
+        elif n > self._svg_annotations:
+            # annotations are drawn last, so new ones can just be appended.
+            tree.elements.extend(self.annotations[self._svg_annotations:])
+        self._svg_annotations = n
         return tree
 
     def _repr_svg_(self):
-        return self.get_svg().tostring()
+        # jupyter asks for this on every display of the object. This is
+        # serialized from the same cached drawing that `get_svg` returns, and
+        # reused for as long as that drawing is (with the same annotations).
+        tree = self._cached_svg()
+        n = self._svg_annotations
+        cached = self._svg_str_cache
+        if cached is None or cached[0] is not tree or cached[1] != n:
+            cached = self._svg_str_cache = (tree, n, tree.tostring())
+        return cached[2]
 
 ################
 # Module-level api
@@ -1710,6 +2263,10 @@ def tree2svg(*t, options=None, **opts):
         return t[0]._repr_svg_()
     return draw_tree(*t, options=options, **opts)._repr_svg_()
 
+def _nltk_repr_svg(t):
+    # reads `default_options` at render time, so later changes apply
+    return TreeLayout(t, options=default_options)._repr_svg_()
+
 # no longer needed for current nltk, but here for backwards compatibility
 def monkeypatch_nltk():
     """
@@ -1720,9 +2277,10 @@ def monkeypatch_nltk():
     svgling if it's available.
     """
     import nltk
-    global default_options
-    nltk.Tree._repr_svg_ = lambda self: TreeLayout(self, options=default_options)._repr_svg_()
+    if nltk.Tree.__dict__.get('_repr_svg_') is not _nltk_repr_svg:
+        nltk.Tree._repr_svg_ = _nltk_repr_svg
 
+_nltk_png_disabled = False
 def disable_nltk_png():
     """
     When nltk's PNG renderer still existed, SVG would take priority, but Jupyter
@@ -1734,8 +2292,16 @@ def disable_nltk_png():
 
     This is not needed on current versions of nltk.
     """
-    try:
-        import nltk
-        del nltk.tree.Tree._repr_png_
-    except:
-        pass
+    global _nltk_png_disabled
+    if _nltk_png_disabled:
+        return
+    import importlib.util
+    # check for nltk without going through a failed import
+    if importlib.util.find_spec("nltk") is not None:
+        try:
+            import nltk
+            del nltk.tree.Tree._repr_png_
+        except (ImportError, AttributeError):
+            # nltk is present but broken, or the renderer is already gone
+            pass
+    _nltk_png_disabled = True
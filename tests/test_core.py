@@ -0,0 +1,70 @@
+import unittest
+
+import svgling
+import svgling.core
+
+
+class TestSvgCache(unittest.TestCase):
+    tree = ("S", ("NP", "a"), ("VP", "b"))
+
+    def test_incremental_annotations_match_fresh_build(self):
+        # annotations added after a render are appended to the cached
+        # drawing; this should be indistinguishable from a fresh build, also
+        # when they extend the canvas (and, with debug on, the grid).
+        for debug in (False, True):
+            layout = svgling.draw_tree(self.tree, debug=debug)
+            layout._repr_svg_()
+            layout.underline_constituent((0,))
+            incremental = layout._repr_svg_()
+            layout.box_constituent((1,))
+            incremental2 = layout._repr_svg_()
+
+            fresh = svgling.draw_tree(self.tree, debug=debug)
+            fresh.underline_constituent((0,))
+            self.assertEqual(incremental, fresh._repr_svg_())
+            fresh.box_constituent((1,))
+            self.assertEqual(incremental2, fresh._repr_svg_())
+
+    def test_repr_follows_direct_annotation_changes(self):
+        layout = svgling.draw_tree(self.tree)
+        plain = layout._repr_svg_()
+        layout.box_constituent((1,))
+        self.assertNotEqual(plain, layout._repr_svg_())
+        layout.annotations.clear()
+        self.assertEqual(plain, layout._repr_svg_())
+        self.assertEqual(plain, layout.get_svg().tostring())
+
+
+class TestEm(unittest.TestCase):
+    def test_em_matches_module_function(self):
+        # also usable before the layout has been rendered
+        layout = svgling.core.TreeLayout(("S", "a"))
+        for n in (0, -0.0, 0, 1.5, -0.0):
+            self.assertEqual(layout._em(n), svgling.core.em(n, layout.options))
+
+
+class TestNodeSpacing(unittest.TestCase):
+    def test_subtree_root_padding_applies_to_all_leaves(self):
+        options = svgling.core.TreeOptions(
+            horiz_spacing=svgling.core.HorizOptions.NODES)
+        x = svgling.core.multiline_node(
+            "x", options=svgling.core.TreeOptions(leaf_padding=10))
+        layout = svgling.core.TreeLayout(("S", ("A", x, "z"), ("B", "y")),
+                                         options=options)
+        # both subtrees are sized with the root's padding, 2:1
+        a, b = layout.layout[1][0], layout.layout[2][0]
+        self.assertAlmostEqual(a.width, 200 / 3)
+        self.assertAlmostEqual(b.width, 100 / 3)
+
+
+class TestPaths(unittest.TestCase):
+    def test_nmost_path_stops_at_missing_daughter(self):
+        layout = svgling.core.TreeLayout(("S", ("NP", "a"), ("VP", "b", ("C", "d"))))
+        self.assertEqual(layout.nmost_path((), 1), [1, 1])
+        self.assertEqual(layout.nmost_path((), 2), [])
+        self.assertEqual(layout.leftmost_path(), [0, 0])
+        self.assertEqual(layout.rightmost_path(), [-1, -1, -1])
+
+
+if __name__ == "__main__":
+    unittest.main()